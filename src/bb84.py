@@ -3,6 +3,7 @@ import numpy as np
 import time
 import components
 
+from functools import lru_cache
 from math import log, ceil
 
 
@@ -145,25 +146,18 @@ class BB84:
         # TODO
         pass
 
-    def calculate_num_eve_check_bits(self, security):
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def calculate_num_eve_check_bits(security):
         return ceil(log(1 - security) / log(0.75))
 
-    def calculate_eve_prob(self, num_check_bits):
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def calculate_eve_prob(num_check_bits):
         # Given n matching check bits, calculate the least upper bound for the
         # probability that Eve has gotten away with eavesdropping.
-
-        value = 0
-        upper_bound = 1
-
-        while upper_bound - value > 0.0001:
-            value_attempt = value + (upper_bound - value) / 2
-            n = self.calculate_num_eve_check_bits(value_attempt)
-            if n > num_check_bits:
-                upper_bound = value_attempt
-            elif n <= num_check_bits:
-                value = value_attempt
-
-        return value
+        # Each check bit catches Eve with probability 1/4.
+        return 1 - 0.75 ** num_check_bits
 
     def check_for_eve(self, security=0.95):
         if self.eve_check_complete:
@@ -1,9 +1,7 @@
 import numpy as np
-import random
 import time
 import warnings
 import math
-import copy
 
 import shared_fns
 import state
@@ -12,6 +10,10 @@ import consts
 
 class UIComponent:
 
+    # The fields used by UIComponent (timestep, stored_data) are declared in
+    # the __slots__ of each subclass.
+    __slots__ = ()
+
     def next_timestep(self):
         '''Store the data from this timestep and set up for the next timestep.'''
         # Store the data from this timestep.
@@ -22,15 +24,22 @@ class UIComponent:
         self.timestep += 1
 
     def get_stored_data_for_timestep(self, timestep):
-        '''Retrieve the stored data for the given timestep.'''
+        '''Retrieve the stored data for the given timestep.
+
+        Only the top-level dict is copied, so the values it contains are
+        shared with the stored data and should be treated as read-only.
+        '''
         stored_data = {}
         if timestep in self.stored_data:
-            stored_data = copy.deepcopy(self.stored_data[timestep])
+            stored_data = dict(self.stored_data[timestep])
         return stored_data
 
 
 class QuantumChannel(UIComponent):
 
+    __slots__ = ("tx_device", "rx_device", "rx_device_socket_id",
+                 "intercepted", "timestep", "tstep_state", "stored_data")
+
     def __init__(self):
         self.tx_device = None
         self.rx_device = None
@@ -63,6 +72,14 @@ class QuantumChannel(UIComponent):
         '''Reset all fields that should not persist past the current timestep.'''
         self.tstep_state = None
 
+    def get_stored_data_for_timestep(self, timestep):
+        '''Retrieve the stored data for the given timestep.'''
+        stored_data = super().get_stored_data_for_timestep(timestep)
+        # Create the state from the stored coefficients.
+        if stored_data and stored_data["state"] is not None:
+            stored_data["state"] = state.NQubitState(stored_data["state"])
+        return stored_data
+
     def connect_tx_device(self, party):
         '''Connect a party to the transmitting end of the quantum channel.'''
         if self.tx_device is not None:
@@ -91,14 +108,15 @@ class QuantumChannel(UIComponent):
 
     def transmit(self, quantum_state):
         '''Transmit a quantum state from sender to target via the quantum channel.'''
-        if not (isinstance(quantum_state, state.Qubit) or
-                isinstance(quantum_state, state.NQubitState)):
+        if not getattr(quantum_state, "is_quantum_state", False):
             raise TypeError(("Can't transmit an object of type {} across a "
                              "quantum channel.").format(type(quantum_state)))
         # Save a copy of the quantum state as it is during transmission through
         # the quantum channel. (This is just so I can display it in the UI -
-        # would not be possible in the real world!)
-        self.tstep_state = state.NQubitState(quantum_state.coefficients)
+        # would not be possible in the real world!)
+        # Only the coefficients are copied here; the NQubitState is created
+        # when the stored data is retrieved.
+        self.tstep_state = np.array(quantum_state.coefficients)
         # Pass the quantum state to the intended recipient.
         if self.rx_device is not None:
             self.rx_device.receive(quantum_state, self.rx_device_socket_id)
@@ -106,6 +124,8 @@ class QuantumChannel(UIComponent):
 
 class QuantumDevice:
 
+    __slots__ = ("uid", "tx_sockets", "rx_sockets", "rx_actions")
+
     def __init__(self, uid):
         self.uid = uid
         self.tx_sockets = {}
@@ -150,9 +170,12 @@ class QuantumDevice:
         n_qubit_state = self.generate_state(state_coeffs)
         return n_qubit_state.split_into_qubits()
 
-    def measure(self, quantum_state, operator):
+    def measure(self, quantum_state, operator, eigh=None):
         '''Measure the state using the given operator.'''
-        return quantum_state.measure(operator)
+        # Only NQubitState.measure accepts a precomputed eigen-decomposition.
+        if eigh is None:
+            return quantum_state.measure(operator)
+        return quantum_state.measure(operator, eigh)
 
     def transmit(self, quantum_state, rx_uid):
         '''Transmit the quantum state to rx_uid via a quantum channel.'''
@@ -182,6 +205,16 @@ class QuantumDevice:
 
 class Party(QuantumDevice, UIComponent):
 
+    __slots__ = ("name", "network_manager", "cchl", "is_eve",
+                 "timestep",
+                 "total_qstates_generated", "total_qstates_transmitted",
+                 "total_qstates_received", "total_qstates_measured",
+                 "total_qstates_forwarded",
+                 "measure_received_qstates", "forward_received_qstates",
+                 "tx_bases", "rx_bases", "tx_bits", "rx_bits",
+                 "sifted_keys", "check_bits", "check_bits_by_uid",
+                 "secret_keys", "compromised_chls", "stored_data")
+
     def __init__(self, uid, name, network_manager, cchl, is_eve=False):
         super().__init__(uid)
         self.name = name
@@ -218,6 +251,9 @@ class Party(QuantumDevice, UIComponent):
         # Store the bits that are used in the keys. (Format same as tx_bits.)
         self.sifted_keys = {}
         self.check_bits  = {}
+        # Also store the check bits by uid, for comparison with the check bits
+        # of other parties. Format: {uidA: {t0: bit, t1: bit}, uidB: {...}, ...}
+        self.check_bits_by_uid = {}
         self.secret_keys = {}
 
         # Track which channels of communication are known to be compromised.
@@ -237,25 +273,52 @@ class Party(QuantumDevice, UIComponent):
             "total_qstates_forwarded": self.total_qstates_forwarded,
             "measure_received_qstates": self.measure_received_qstates,
             "forward_received_qstates": self.forward_received_qstates,
-            # From classical computer
-            "tx_bases": copy.deepcopy(self.tx_bases),
-            "rx_bases": copy.deepcopy(self.rx_bases),
-            "tx_bits": copy.deepcopy(self.tx_bits),
-            "rx_bits": copy.deepcopy(self.rx_bits),
-            "sifted_keys": copy.deepcopy(self.sifted_keys),
-            "check_bits": copy.deepcopy(self.check_bits),
-            "secret_keys": copy.deepcopy(self.secret_keys),
-            "compromised_chls": copy.deepcopy(self.compromised_chls)
+            # From classical computer
+            # Only the entry for the current timestep of each of the following
+            # dicts can change during a timestep, so only that entry is stored.
+            # The full dicts are rebuilt by get_stored_data_for_timestep.
+            "tx_bases": self.copy_timestep_entry(self.tx_bases),
+            "rx_bases": self.copy_timestep_entry(self.rx_bases),
+            "tx_bits": self.copy_timestep_entry(self.tx_bits),
+            "rx_bits": self.copy_timestep_entry(self.rx_bits),
+            "sifted_keys": self.copy_timestep_entry(self.sifted_keys),
+            "check_bits": self.copy_timestep_entry(self.check_bits),
+            "secret_keys": self.copy_timestep_entry(self.secret_keys),
+            "compromised_chls": list(self.compromised_chls)
         }
 
+    def copy_timestep_entry(self, d):
+        '''Return a copy of d[self.timestep], or None if there is no such entry.'''
+        if self.timestep in d:
+            return dict(d[self.timestep])
+        return None
+
+    def get_stored_data_for_timestep(self, timestep):
+        '''Retrieve the stored data for the given timestep.'''
+        stored_data = super().get_stored_data_for_timestep(timestep)
+        if not stored_data:
+            return stored_data
+
+        # Rebuild each dict (format {timestep: {uid: value, ...}, ...}) from
+        # the entries that were stored for every timestep up to this one.
+        tstep_dicts = ["tx_bases", "rx_bases", "tx_bits", "rx_bits",
+                       "sifted_keys", "check_bits", "secret_keys"]
+        for field in tstep_dicts:
+            stored_data[field] = {}
+        for stored_tstep in sorted(self.stored_data):
+            if stored_tstep > timestep:
+                break
+            for field in tstep_dicts:
+                entry = self.stored_data[stored_tstep][field]
+                if entry is not None:
+                    stored_data[field][stored_tstep] = dict(entry)
+
+        return stored_data
+
     def reset_tstep_fields(self):
         '''Reset all fields that should not persist past the current timestep.'''
         pass
 
-    def choose_from(self, options):
-        return random.choice(options)
-
-
     def generate_state(self, coeffs):
         '''Create a new state with the given coefficients.'''
         state = super().generate_state(coeffs)
@@ -274,15 +337,15 @@ class Party(QuantumDevice, UIComponent):
         state = self.generate_state(basis[bit])
 
         # Keep a record of the bit and basis used to generate the state.
-        self.store_value_in_dict(self.tx_bases, rx_uid, basis)
-        self.store_value_in_dict(self.tx_bits, rx_uid, bit)
+        self.tx_bases.setdefault(self.timestep, {})[rx_uid] = basis
+        self.tx_bits.setdefault(self.timestep, {})[rx_uid] = bit
 
         # Transmit the state to the target party.
         self.transmit(state, rx_uid)
 
-    def measure(self, quantum_state, operator):
+    def measure(self, quantum_state, operator, eigh=None):
         '''Measure the state using the given operator.'''
-        measured_value = super().measure(quantum_state, operator)
+        measured_value = super().measure(quantum_state, operator, eigh)
         self.total_qstates_measured += 1
         return measured_value
 
@@ -299,12 +362,12 @@ class Party(QuantumDevice, UIComponent):
                                  "state can't be measured.").format(self.uid,
                                                                     self.name))
 
-            operator = shared_fns.get_measurement_operator([0, 1], basis)
-            bit = self.measure(qstate, operator)
+            operator, eigh = shared_fns.get_basis_measurement(basis)
+            bit = self.measure(qstate, operator, eigh)
 
             # Keep a record of the measurement basis and the measured bit.
-            self.store_value_in_dict(self.rx_bases, tx_uid, basis)
-            self.store_value_in_dict(self.rx_bits, tx_uid, bit)
+            self.rx_bases.setdefault(self.timestep, {})[tx_uid] = basis
+            self.rx_bits.setdefault(self.timestep, {})[tx_uid] = bit
 
         # Forward the quantum state to the forwarding UID.
         # if self.forward_received_qstates:
@@ -313,8 +376,8 @@ class Party(QuantumDevice, UIComponent):
             # Note: If forwarding without measuring, then the basis and the
             # bit are both stored as None.
             forward_uid = self.rx_actions[tx_uid]["forward_uid"]
-            self.store_value_in_dict(self.tx_bases, forward_uid, basis)
-            self.store_value_in_dict(self.tx_bits, forward_uid, bit)
+            self.tx_bases.setdefault(self.timestep, {})[forward_uid] = basis
+            self.tx_bits.setdefault(self.timestep, {})[forward_uid] = bit
             # Forward the quantum state to the forward_uid.
             self.transmit(qstate, forward_uid)
             self.total_qstates_forwarded += 1
@@ -331,13 +394,6 @@ class Party(QuantumDevice, UIComponent):
         self.rx_actions[tx_uid]["forward"] = True
         self.rx_actions[tx_uid]["forward_uid"] = forward_uid
 
-    def store_value_in_dict(self, d, key, val):
-        '''Store the key, val pair in dictionary d[self.timestep].'''
-        if self.timestep not in d:
-            d[self.timestep] = {}
-
-        d[self.timestep][key] = val
-
     ###########################################################################
     # CLASSICAL LOGIC
     ###########################################################################
@@ -370,41 +426,39 @@ class Party(QuantumDevice, UIComponent):
 
     def add_bit_to_keys(self, uid):
         '''Add the bit from the current timestep to the keys for the given uid.'''
-        # If the uid is in the rx_bits dictionary, then store the rx_bit value.
-        if self.timestep in self.rx_bits:
-            if uid in self.rx_bits[self.timestep]:
-                bit = self.rx_bits[self.timestep][uid]
-                self.store_value_in_dict(self.sifted_keys, uid, bit)
+        rx_bits = self.rx_bits.get(self.timestep, {})
+        tx_bits = self.tx_bits.get(self.timestep, {})
 
-        # If the uid is contained in both rx_bits and tx_bits, then the rx bit
+        # If the uid is contained in both rx_bits and tx_bits, then the rx bit
         # is overwritten by the tx bit.
-        if self.timestep in self.tx_bits:
-            if uid in self.tx_bits[self.timestep]:
-                bit = self.tx_bits[self.timestep][uid]
-                self.store_value_in_dict(self.sifted_keys, uid, bit)
+        if uid in tx_bits:
+            self.sifted_keys.setdefault(self.timestep, {})[uid] = tx_bits[uid]
+        elif uid in rx_bits:
+            self.sifted_keys.setdefault(self.timestep, {})[uid] = rx_bits[uid]
 
         self.synch_sifted_and_secret_keys()
 
     def add_all_bits_to_keys(self):
         '''Extend the keys using the tx bits or rx bits from this timestep.'''
-        # Update the secret key for each uid in the rx_bits dictionary.
-        if self.timestep in self.rx_bits:
-            for uid in self.rx_bits[self.timestep]:
-                bit = self.rx_bits[self.timestep][uid]
-                self.store_value_in_dict(self.sifted_keys, uid, bit)
-
-        # If a uid is contained in both rx_bits and tx_bits, then the rx_bits
-        # are overwritten by the tx_bits.
-        if self.timestep in self.tx_bits:
-            for uid in self.tx_bits[self.timestep]:
-                bit = self.tx_bits[self.timestep][uid]
-                self.store_value_in_dict(self.sifted_keys, uid, bit)
+        # Collect the rx bits for this timestep. If a uid is contained in both
+        # rx_bits and tx_bits, then the rx_bits are overwritten by the tx_bits.
+        tstep_bits = dict(self.rx_bits.get(self.timestep, {}))
+        tstep_bits.update(self.tx_bits.get(self.timestep, {}))
+
+        # Update the sifted key for each uid with a bit in this timestep.
+        if tstep_bits:
+            self.sifted_keys.setdefault(self.timestep, {}).update(tstep_bits)
 
         self.synch_sifted_and_secret_keys()
 
     def synch_sifted_and_secret_keys(self):
         '''Update the secret keys to match the sifted keys.'''
-        self.secret_keys = copy.deepcopy(self.sifted_keys)
+        # Bits are only ever added to the sifted keys in the current timestep,
+        # so the secret keys for all previous timesteps are already in synch.
+        if self.timestep in self.sifted_keys:
+            self.secret_keys[self.timestep] = dict(self.sifted_keys[self.timestep])
+        else:
+            self.secret_keys.pop(self.timestep, None)
 
     def add_check_bit(self, uid):
         '''If there is a bit in the current timestep of the sifted key for the
@@ -413,25 +467,32 @@ class Party(QuantumDevice, UIComponent):
             # Use the bit from this timestep as a check bit.
             check_bit = self.sifted_keys[self.timestep][uid]
             # Store this bit in the check_bits dictionary.
-            self.store_value_in_dict(self.check_bits, uid, check_bit)
+            self.check_bits.setdefault(self.timestep, {})[uid] = check_bit
+            self.check_bits_by_uid.setdefault(uid, {})[self.timestep] = check_bit
 
     def remove_check_bits_from_secret_keys(self):
         '''Remove all check bits from the secret keys.'''
-        # Remove check bits from the secret keys.
-        for timestep in self.check_bits:
-            if timestep in self.secret_keys:
-                for uid in self.check_bits[timestep]:
-                    if uid in self.secret_keys[timestep]:
-                        self.secret_keys[timestep].pop(uid)
-
-        # Remove any timesteps of the secret keys that are now empty.
-        for timestep in list(self.secret_keys):
-            if not self.secret_keys[timestep]:
-                self.secret_keys.pop(timestep)
+        # Check bits are only ever added in the current timestep, and the check
+        # bits from previous timesteps were removed from the secret keys in
+        # those timesteps, so only the current timestep needs to be updated.
+        check_bits = self.check_bits.get(self.timestep)
+        secret_keys = self.secret_keys.get(self.timestep)
+        if check_bits and secret_keys:
+            for uid in check_bits.keys() & secret_keys.keys():
+                del secret_keys[uid]
+            # Remove the timestep from the secret keys if it is now empty.
+            if not secret_keys:
+                self.secret_keys.pop(self.timestep)
+
+    def update_secret_keys(self):
+        '''Set the secret keys to the sifted keys without the check bits.'''
+        self.synch_sifted_and_secret_keys()
+        self.remove_check_bits_from_secret_keys()
 
     def broadcast_check_bits(self):
         '''Broadcast all the check bits for every party and timestep.'''
-        check_bits = copy.deepcopy(self.check_bits)
+        # The bits are immutable, so copying each timestep's dict is enough.
+        check_bits = {t: dict(bits) for t, bits in self.check_bits.items()}
         message = {
             "timestep": self.timestep,
             "type": "broadcast_check_bits",
@@ -446,11 +507,15 @@ class Party(QuantumDevice, UIComponent):
 
         # Check for eavesdropping by testing whether the sender's check bits
         # match this party's check bits for every timestep.
-        sender_check_bits = shared_fns.reorder_by_uid(sender_check_bits)
-        own_check_bits = shared_fns.reorder_by_uid(self.check_bits)
+        # (Only the sender's check bits for this party are needed, so the
+        # whole message doesn't need to be reordered by uid.)
+        sender_check_bits = {timestep: bits[self.uid]
+                             for timestep, bits in sender_check_bits.items()
+                             if self.uid in bits}
+        own_check_bits = self.check_bits_by_uid.get(sender_uid)
         compromised = (
-            self.uid in sender_check_bits and sender_uid in own_check_bits
-            and sender_check_bits[self.uid] != own_check_bits[sender_uid]
+            sender_check_bits and own_check_bits is not None
+            and sender_check_bits != own_check_bits
         )
         if compromised:
             self.compromised_chls.append(sender_uid)
@@ -458,6 +523,8 @@ class Party(QuantumDevice, UIComponent):
 
 class ClassicalChannel(UIComponent):
 
+    __slots__ = ("timestep", "tstep_messages", "msg_index", "stored_data")
+
     def __init__(self):
         self.reset()
 
@@ -465,74 +532,63 @@ class ClassicalChannel(UIComponent):
         '''Reset the classical channel to its configuration at timestep 0.'''
         self.timestep = 0
         self.tstep_messages = {}
+        # Index the message data by type and timestep so that it can be
+        # retrieved without scanning every message.
+        # Format: {(msg_type, timestep): {sender_uid: data, ...}, ...}
+        self.msg_index = {}
         self.stored_data = {}
 
     def store_timestep_data(self):
         '''Store the data from this timestep.'''
         self.stored_data = {
-            "tstep_messages": copy.deepcopy(self.tstep_messages)
+            # Messages are never modified after they are added, so only the
+            # lists of messages need to be copied.
+            "tstep_messages": {uid: list(msgs)
+                               for uid, msgs in self.tstep_messages.items()}
         }
 
     def reset_tstep_fields(self):
         '''Reset all fields that should not persist past the current timestep.'''
         self.tstep_messages = {}
+        self.msg_index = {}
 
     ###########################################################################
     # MESSAGE PROCESSING METHODS
     ###########################################################################
 
-    # TODO make a single, generic message retrieval method
-    # Note that get_tx_bases and get_rx_bases are currently structured slightly
-    # differently from the other message retrieval methods. Is this necessary?
+    def get_messages(self, msg_type, timestep, sender_uid=None, default=None):
+        '''Retrieve the data from messages of the given type for the given timestep.
+
+        If sender_uid is given, return only the data from that sender (or
+        default if there is no such message); otherwise return a dict of the
+        data from every sender, keyed by sender uid.
+        '''
+        msgs = self.msg_index.get((msg_type, timestep), {})
+        if sender_uid is None:
+            return dict(msgs)
+        return msgs.get(sender_uid, default)
 
     def get_tx_bases(self, timestep):
         '''Retrieve all messages of type "broadcast_tx_bases" for the given timestep.'''
-        tx_bases = {}
-        for tx_uid in self.tstep_messages:
-            for msg in self.tstep_messages[tx_uid]:
-                if msg["type"] == "broadcast_tx_bases":
-                    if msg["timestep"] == timestep:
-                        tx_bases[tx_uid] = msg["data"]
-        return tx_bases
+        return self.get_messages("broadcast_tx_bases", timestep)
 
     def get_rx_bases(self, timestep):
         '''Retrieve all messages of type "broadcast_rx_bases" for the given timestep.'''
-        rx_bases = {}
-        for rx_uid in self.tstep_messages:
-            for msg in self.tstep_messages[rx_uid]:
-                if msg["type"] == "broadcast_rx_bases":
-                    if msg["timestep"] == timestep:
-                        rx_bases[rx_uid] = msg["data"]
-        return rx_bases
+        return self.get_messages("broadcast_rx_bases", timestep)
 
     def get_msg_check_bits(self, timestep, sender_uid):
         '''Retrieve all messages of type "broadcast_check_bits" for the given timestep.'''
-        check_bits = {}
-        if sender_uid in self.tstep_messages:
-            for msg in self.tstep_messages[sender_uid]:
-                if msg["type"] == "broadcast_check_bits":
-                    if msg["timestep"] == timestep:
-                        check_bits = msg["data"]
-        return check_bits
+        return self.get_messages("broadcast_check_bits", timestep,
+                                 sender_uid, {})
 
     def get_flip_bit_instructions(self, timestep, sender_uid):
         '''Retrieve a message from sender_uid of type "broadcast_flip_bit_instructions" for the given timestep.'''
-        flip_bit_instrs = {}
-        if sender_uid in self.tstep_messages:
-            for msg in self.tstep_messages[sender_uid]:
-                if msg["type"] == "broadcast_flip_bit_instructions":
-                    if msg["timestep"] == timestep:
-                        flip_bit_instrs = msg["data"]
-        return flip_bit_instrs
+        return self.get_messages("broadcast_flip_bit_instructions", timestep,
+                                 sender_uid, {})
 
     def get_msg_key_length(self, timestep, sender_uid):
-        key_length = math.inf
-        if sender_uid in self.tstep_messages:
-            for msg in self.tstep_messages[sender_uid]:
-                if msg["type"] == "broadcast_key_length":
-                    if msg["timestep"] == timestep:
-                        key_length = msg["data"]
-        return key_length
+        return self.get_messages("broadcast_key_length", timestep,
+                                 sender_uid, math.inf)
 
     ###########################################################################
     # CLASSICAL COMMUNICATION METHODS
@@ -540,7 +596,9 @@ class ClassicalChannel(UIComponent):
 
     def add_message(self, sender_uid, message):
         '''Add a message from sender_uid to the classical channel.'''
-        if sender_uid not in self.tstep_messages:
-            self.tstep_messages[sender_uid] = []
-        self.tstep_messages[sender_uid].append(message)
+        self.tstep_messages.setdefault(sender_uid, []).append(message)
+        # Index the message data. If sender_uid has already sent a message of
+        # this type for this timestep, then the newer message replaces it.
+        msg_key = (message["type"], message["timestep"])
+        self.msg_index.setdefault(msg_key, {})[sender_uid] = message["data"]
 
@@ -1,5 +1,8 @@
 import unittest
+import math
 import components
+import consts
+import shared_fns
 
 class TestPartyFlipBitMethods(unittest.TestCase):
 
@@ -94,5 +97,111 @@ class TestPartyFlipBitMethods(unittest.TestCase):
                 with self.assertWarns(Warning):
                     self.party.flip_bits(flip_bits_str)
 
+class TestClassicalChannelMessageRetrieval(unittest.TestCase):
+
+    def setUp(self):
+        self.cchl = components.ClassicalChannel()
+
+    def tearDown(self):
+        del self.cchl
+
+    def add_message(self, sender_uid, msg_type, timestep, data):
+        message = {"timestep": timestep, "type": msg_type, "data": data}
+        self.cchl.add_message(sender_uid, message)
+
+    def test_get_bases_by_timestep(self):
+        self.add_message(0, "broadcast_tx_bases", 1, {1: "tx_basis"})
+        self.add_message(1, "broadcast_rx_bases", 1, {0: "rx_basis"})
+        self.add_message(0, "broadcast_tx_bases", 2, {1: "other_basis"})
+
+        self.assertEqual(self.cchl.get_tx_bases(1), {0: {1: "tx_basis"}})
+        self.assertEqual(self.cchl.get_rx_bases(1), {1: {0: "rx_basis"}})
+        self.assertEqual(self.cchl.get_rx_bases(2), {})
+
+    def test_get_msg_from_sender(self):
+        self.add_message(0, "broadcast_check_bits", 3, {3: {1: 0}})
+        self.add_message(0, "broadcast_key_length", 3, 5)
+
+        self.assertEqual(self.cchl.get_msg_check_bits(3, 0), {3: {1: 0}})
+        self.assertEqual(self.cchl.get_msg_check_bits(3, 1), {})
+        self.assertEqual(self.cchl.get_flip_bit_instructions(3, 0), {})
+        self.assertEqual(self.cchl.get_msg_key_length(3, 0), 5)
+        self.assertEqual(self.cchl.get_msg_key_length(4, 0), math.inf)
+
+    def test_latest_msg_replaces_earlier_msg(self):
+        self.add_message(0, "broadcast_check_bits", 3, {3: {1: 0}})
+        self.add_message(0, "broadcast_check_bits", 3, {3: {1: 1}})
+
+        self.assertEqual(self.cchl.get_msg_check_bits(3, 0), {3: {1: 1}})
+
+    def test_msgs_are_cleared_between_timesteps(self):
+        self.add_message(0, "broadcast_tx_bases", 0, {1: "tx_basis"})
+        self.cchl.next_timestep()
+
+        self.assertEqual(self.cchl.get_tx_bases(0), {})
+
+    def test_get_messages(self):
+        self.add_message(0, "broadcast_key_length", 2, 7)
+        self.add_message(1, "broadcast_key_length", 2, 9)
+
+        self.assertEqual(self.cchl.get_messages("broadcast_key_length", 2),
+                         {0: 7, 1: 9})
+        self.assertEqual(self.cchl.get_messages("broadcast_key_length", 2, 1), 9)
+        self.assertIsNone(self.cchl.get_messages("broadcast_key_length", 2, 2))
+        self.assertEqual(self.cchl.get_messages("broadcast_rx_bases", 2), {})
+
+class TestPartyStoredData(unittest.TestCase):
+
+    FIELDS = ["tx_bases", "tx_bits", "sifted_keys", "check_bits", "secret_keys"]
+
+    def setUp(self):
+        self.party = components.Party(0, "A", None, components.ClassicalChannel())
+
+    def tearDown(self):
+        del self.party
+
+    def run_timestep(self, bit, bases_match, use_as_check_bit):
+        '''Send a bit to party 1 and return a copy of the party's state.'''
+        party = self.party
+        party.tx_bits.setdefault(party.timestep, {})[1] = bit
+        party.tx_bases.setdefault(party.timestep, {})[1] = consts.STD_BASIS
+        if bases_match:
+            party.add_all_bits_to_keys()
+            if use_as_check_bit:
+                party.add_check_bit(1)
+        party.synch_sifted_and_secret_keys()
+        party.remove_check_bits_from_secret_keys()
+
+        state = {field: {t: dict(vals) for t, vals in getattr(party, field).items()}
+                 for field in self.FIELDS}
+        party.next_timestep()
+        return state
+
+    def test_stored_data_matches_earlier_state(self):
+        states = [self.run_timestep(t % 2, t != 3, t == 2) for t in range(6)]
+
+        for timestep, state in enumerate(states):
+            stored_data = self.party.get_stored_data_for_timestep(timestep)
+            for field in self.FIELDS:
+                self.assertEqual(stored_data[field], state[field])
+
+class TestQuantumDeviceMeasurement(unittest.TestCase):
+
+    def setUp(self):
+        self.device = components.QuantumDevice(0)
+        self.operator, self.eigh = shared_fns.get_basis_measurement(consts.STD_BASIS)
+
+    def tearDown(self):
+        del self.device
+
+    def test_measure_qubit(self):
+        qubits = self.device.generate_qubits([0, 0, 1, 0])
+        self.assertEqual(self.device.measure(qubits[0], self.operator), 0)
+        self.assertEqual(self.device.measure(qubits[1], self.operator), 1)
+
+    def test_measure_state_with_eigen_decomposition(self):
+        qstate = self.device.generate_state([0, 1])
+        self.assertEqual(self.device.measure(qstate, self.operator, self.eigh), 1)
+
 if __name__ == '__main__':
     unittest.main()
@@ -3,3 +3,8 @@ from math import sqrt
 
 STD_BASIS = np.eye(2)
 HAD_BASIS = (1 / sqrt(2)) * np.array([[1, 1], [1, -1]])
+
+# Integer tags for the bases above, and the bases indexed by tag.
+STD_BASIS_ID = 0
+HAD_BASIS_ID = 1
+BASES = (STD_BASIS, HAD_BASIS)
@@ -3,6 +3,7 @@ import numpy as np
 import time
 import components
 
+from functools import lru_cache
 from math import log, ceil
 
 
@@ -160,52 +161,18 @@ class E91:
         eve.set_target(self.bob.uid)
         self.eve = eve
 
-    def calculate_num_eve_check_bits(self, security):
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def calculate_num_eve_check_bits(security):
         return ceil(log(1 - security) / log(0.75))
 
-    def calculate_eve_prob(self, num_check_bits):
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def calculate_eve_prob(num_check_bits):
         # Given n matching check bits, calculate the least upper bound for the
         # probability that Eve has gotten away with eavesdropping.
-
-        value = 0
-        upper_bound = 1
-
-        while upper_bound - value > 0.0001:
-            value_attempt = value + (upper_bound - value) / 2
-            n = self.calculate_num_eve_check_bits(value_attempt)
-            if n > num_check_bits:
-                upper_bound = value_attempt
-            elif n <= num_check_bits:
-                value = value_attempt
-
-        return value
-
-        if self.eve_check_complete:
-            return
-
-        num_bits = self.calculate_num_eve_check_bits(security)
-        sifted_key_length = self.alice.sifted_key_length
-
-        if sifted_key_length - num_bits < self.min_key_length:
-            print("Not enough bits to run eavesdropping test.\n")
-
-        else:
-            idxs = sorted(random.sample(self.alice.sifted_key_idxs, num_bits))
-            self.alice.add_check_bits(idxs)
-            self.bob.add_check_bits(idxs)
-
-            print("Alice's check bits: {}".format(self.alice.format_check_bits()))
-            print("Bob's check bits:   {}".format(self.bob.format_check_bits()))
-
-            if self.alice.check_bits == self.bob.check_bits:
-                print("\nKey security: {:.3f}%.\n".format(security * 100))
-                print("Secret key:         {}\n".format(self.alice.format_secret_key()))
-                self.eve_check_complete = True
-                self.secret_key = self.alice.secret_key
-
-            else:
-                print("\nEavesdropping detected! Aborting this run of the protocol.\n")
-                self.reset()
+        # Each check bit catches Eve with probability 1/4.
+        return 1 - 0.75 ** num_check_bits
 
     def check_for_eve(self, security=0.95):
         if self.eve_check_complete:
@@ -0,0 +1,30 @@
+import unittest
+from math import log, ceil
+from bb84 import BB84
+from e91 import E91
+
+def bisect_eve_prob(num_check_bits):
+    '''The bisection search that calculate_eve_prob used to run.'''
+    value = 0
+    upper_bound = 1
+
+    while upper_bound - value > 0.0001:
+        value_attempt = value + (upper_bound - value) / 2
+        n = ceil(log(1 - value_attempt) / log(0.75))
+        if n > num_check_bits:
+            upper_bound = value_attempt
+        elif n <= num_check_bits:
+            value = value_attempt
+
+    return value
+
+class TestCalculateEveProb(unittest.TestCase):
+
+    def test_matches_bisection(self):
+        for protocol in (BB84, E91):
+            for n in range(101):
+                self.assertLess(abs(bisect_eve_prob(n) -
+                                    protocol.calculate_eve_prob(n)), 1e-4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -40,6 +40,7 @@ class NetworkManager:
         self.network = network
         self.parties = nx.get_node_attributes(self.network, "party")
         self.qchls = nx.get_edge_attributes(self.network, "qchl")
+        self.update_adjacency()
 
         self.intercepted_edges = {}
         self.reset()
@@ -47,39 +48,47 @@ class NetworkManager:
     def reset(self):
         '''Reset the network to its configuration at timestep 0.'''
         # Reset all of the parties in the network.
-        for uid in self.parties:
-            self.parties[uid].reset()
+        for party in self.parties.values():
+            party.reset()
         # Reset all of the quantum channels in the network.
-        for uid in self.qchls:
-            self.qchls[uid].reset()
+        for qchl in self.qchls.values():
+            qchl.reset()
         # Reset the network manager's timestep counter.
         self.timestep = 0
 
     def next_timestep(self):
         '''Store the data from this timestep and set up for the next timestep.'''
         # Increment the timestep for all the parties in the network.
-        for uid in self.parties:
-            self.parties[uid].next_timestep()
+        for party in self.parties.values():
+            party.next_timestep()
         # Increment the timestep for all the qchls in the network.
-        for uid in self.qchls:
-            self.qchls[uid].next_timestep()
+        for qchl in self.qchls.values():
+            qchl.next_timestep()
         # Increment the network manager's timestep counter.
         self.timestep += 1
 
     def store_timestep_data(self):
         '''Store the data from this timestep.'''
         # Store the data for all the parties in the network.
-        for uid in self.parties:
-            self.parties[uid].store_timestep_data()
+        for party in self.parties.values():
+            party.store_timestep_data()
         # Store the data for all the qchls in the network.
-        for uid in self.qchls:
-            self.qchls[uid].store_timestep_data()
+        for qchl in self.qchls.values():
+            qchl.store_timestep_data()
+
+    def update_adjacency(self):
+        '''Cache the successors and predecessors of every node in the network.'''
+        # This must be called again whenever the edges of the network change.
+        self.successors = {uid: list(self.network.successors(uid))
+                           for uid in self.network}
+        self.predecessors = {uid: list(self.network.predecessors(uid))
+                             for uid in self.network}
 
     def get_successors(self, party_uid):
-        return list(self.network.successors(party_uid))
+        return self.successors[party_uid]
 
     def get_predecessors(self, party_uid):
-        return list(self.network.predecessors(party_uid))
+        return self.predecessors[party_uid]
 
     def get_legitimate_party_uids(self):
         return list(self.parties.keys())
@@ -147,6 +156,7 @@ class NetworkManager:
         nx.set_edge_attributes(self.network, qchls, "qchl")
         self.qchls = qchls
         self.intercepted_edges = intercepted_edges
+        self.update_adjacency()
 
     ###########################################################################
     # UI STORED DATA RETRIEVAL METHODS
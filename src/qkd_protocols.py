@@ -1,7 +1,5 @@
 import networkx as nx
-import numpy as np
 import random
-import copy
 import math
 
 import components
@@ -44,14 +42,20 @@ class QKDProtocol:
             k = max([max((a, b) for a, b in edges)])
 
         self.network_manager = NetworkManager(self.cchl, edges)
+        self.update_party_roles()
         self.reset()
 
     def add_eavesdropping(self, edges):
         '''Add eavesdropping to the specified edges.'''
         self.network_manager.intercept_edges(edges, self.cchl)
+        self.update_party_roles()
         self.eavesdropping = True
         self.intercepted_edges = edges
 
+    def update_party_roles(self):
+        '''Find any parties with a special role, whenever the network changes.'''
+        pass
+
     def next_timestep(self):
         '''Store the data from this timestep and set up for the next timestep.'''
         self.cchl.next_timestep()
@@ -74,7 +78,7 @@ class QKDProtocol:
     def get_stored_data_for_timestep(self, timestep):
         '''Retrieve all of the stored data for a given timestep.'''
         stored_data = {
-            "protocol": copy.deepcopy(self.stored_data[timestep]),
+            "protocol": dict(self.stored_data[timestep]),
             "cchl": self.cchl.get_stored_data_for_timestep(timestep),
             "parties": self.network_manager.get_party_stored_data_for_timestep(timestep),
             "qchls": self.network_manager.get_qchl_stored_data_for_timestep(timestep)
@@ -143,15 +147,13 @@ class QKDProtocol:
         # TODO Move this to NetworkManager
         parties = self.network_manager.get_parties()
         min_key_length = math.inf
-        for uidA in parties:
-            partyA = parties[uidA]
+        for partyA in parties.values():
             secret_keys = partyA.secret_keys
             if not secret_keys:
                 min_key_length = 0
                 break
-            secret_keys_by_uid = shared_fns.reorder_by_uid(secret_keys)
-            for uidB in secret_keys_by_uid:
-                key_length = len(list(secret_keys_by_uid[uidB]))
+            key_lengths = shared_fns.count_by_uid(secret_keys)
+            for key_length in key_lengths.values():
                 if key_length < min_key_length:
                     min_key_length = key_length
 
@@ -162,17 +164,15 @@ class QKDProtocol:
         # TODO Move this to NetworkManager
         parties = self.network_manager.get_parties()
         min_check_bits = math.inf
-        for uidA in parties:
-            partyA = parties[uidA]
+        for partyA in parties.values():
             check_bits = partyA.check_bits
             if not check_bits:
                 min_check_bits = 0
                 break
-            check_bits_by_uid = shared_fns.reorder_by_uid(check_bits)
-            for uidB in check_bits_by_uid:
-                key_length = len(list(check_bits_by_uid[uidB]))
-                if key_length < min_check_bits:
-                    min_check_bits = key_length
+            check_bit_counts = shared_fns.count_by_uid(check_bits)
+            for num_check_bits in check_bit_counts.values():
+                if num_check_bits < min_check_bits:
+                    min_check_bits = num_check_bits
 
         return min_check_bits
 
@@ -208,8 +208,7 @@ class QKDProtocol:
         total_qstates_received = 0
 
         parties = self.network_manager.get_parties()
-        for party_uid in parties:
-            party = parties[party_uid]
+        for party in parties.values():
             total_qstates_generated += party.total_qstates_generated
             total_qstates_transmitted += party.total_qstates_transmitted
             total_qstates_received += party.total_qstates_received
@@ -220,38 +219,28 @@ class QKDProtocol:
 
     def display_data(self, display_bits=True):
         '''Print the protocol data to the terminal.'''
+        # Collect the output lines and print them all at once.
+        lines = []
         parties = self.network_manager.get_parties()
         qubit_counts = self.calculate_qubit_counts()
 
-        print("Protocol iterations: {}".format(self.num_iterations))
-        print("Generated qubits:    {}".format(qubit_counts[0]))
-        print("Transmitted qubits:  {}".format(qubit_counts[1]))
-        print("Received qubits:     {}".format(qubit_counts[2]))
+        lines.append("Protocol iterations: {}".format(self.num_iterations))
+        lines.append("Generated qubits:    {}".format(qubit_counts[0]))
+        lines.append("Transmitted qubits:  {}".format(qubit_counts[1]))
+        lines.append("Received qubits:     {}".format(qubit_counts[2]))
 
-        min_key_length = math.inf
-        for uidA in parties:
-            partyA = parties[uidA]
-            secret_keys = partyA.secret_keys
-            if not secret_keys:
-                min_key_length = 0
-                break
-            secret_keys_by_uid = shared_fns.reorder_by_uid(secret_keys)
-            for uidB in secret_keys_by_uid:
-                key_length = len(list(secret_keys_by_uid[uidB]))
-                if key_length < min_key_length:
-                    min_key_length = key_length
-
-        print("Secret key length:   {}".format(min_key_length))
+        min_key_length = self.get_shortest_key_length()
+        lines.append("Secret key length:   {}".format(min_key_length))
 
         if not display_bits:
+            print("\n".join(lines))
             return
 
         # Display the tx/rx bits & bases for each party.
-        for uidA in parties:
-            partyA = parties[uidA]
+        for partyA in parties.values():
             # Display the tx bits & bases, if they exist.
             if partyA.tx_bits:
-                print("\nParty {} (tx)".format(partyA.name))
+                lines.append("\nParty {} (tx)".format(partyA.name))
                 tx_bits = shared_fns.reorder_by_uid(partyA.tx_bits)
                 tx_bases = shared_fns.reorder_by_uid(partyA.tx_bases)
                 tx_bits_str = shared_fns.convert_dod_to_dos(tx_bits)
@@ -263,15 +252,15 @@ class QKDProtocol:
                     partyB_tx_bits_str = tx_bits_str[uidB]
                     partyB_tx_bases_str = tx_bases_str[uidB]
 
-                    print("    {} -> {}:  {}".format(partyA.name,
-                                                     partyB.name,
-                                                     partyB_tx_bits_str))
+                    lines.append("    {} -> {}:  {}".format(partyA.name,
+                                                            partyB.name,
+                                                            partyB_tx_bits_str))
 
-                    print("             {}".format(partyB_tx_bases_str))
+                    lines.append("             {}".format(partyB_tx_bases_str))
 
             # Display the rx bits & bases, if they exist.
             if partyA.rx_bits:
-                print("\nParty {} (rx)".format(partyA.name))
+                lines.append("\nParty {} (rx)".format(partyA.name))
                 rx_bits = shared_fns.reorder_by_uid(partyA.rx_bits)
                 rx_bases = shared_fns.reorder_by_uid(partyA.rx_bases)
                 rx_bits_str = shared_fns.convert_dod_to_dos(rx_bits)
@@ -283,29 +272,27 @@ class QKDProtocol:
                     partyB_rx_bits_str = rx_bits_str[uidB]
                     partyB_rx_bases_str = rx_bases_str[uidB]
 
-                    print("    {} -> {}:  {}".format(partyB.name,
-                                                     partyA.name,
-                                                     partyB_rx_bits_str))
+                    lines.append("    {} -> {}:  {}".format(partyB.name,
+                                                            partyA.name,
+                                                            partyB_rx_bits_str))
 
-                    print("             {}".format(partyB_rx_bases_str))
+                    lines.append("             {}".format(partyB_rx_bases_str))
 
         # Display the sifted keys.
-        print("\n")
-        for uidA in parties:
-            partyA = parties[uidA]
+        lines.append("\n")
+        for partyA in parties.values():
             sifted_keys = partyA.sifted_keys
             sifted_keys_by_uid = shared_fns.reorder_by_uid(sifted_keys)
             sifted_key_strs = shared_fns.convert_dod_to_dos(sifted_keys_by_uid)
             for uidB in sifted_keys_by_uid:
                 partyB = parties[uidB]
-                print("{} <-> {} key: {}".format(partyA.name,
-                                                 partyB.name,
-                                                 sifted_key_strs[uidB]))
+                lines.append("{} <-> {} key: {}".format(partyA.name,
+                                                        partyB.name,
+                                                        sifted_key_strs[uidB]))
 
         # Display the check bits.
         first_line = True
-        for uidA in parties:
-            partyA = parties[uidA]
+        for partyA in parties.values():
             check_bits = partyA.check_bits
             check_bits_by_uid = shared_fns.reorder_by_uid(check_bits)
             check_bits_strs = shared_fns.convert_dod_to_dos(check_bits_by_uid)
@@ -313,27 +300,28 @@ class QKDProtocol:
                 check_bits_exist = True
                 partyB = parties[uidB]
                 if first_line:
-                    print()
+                    lines.append("")
                     first_line = False
-                print("{} <-> {} CBs: {}".format(partyA.name,
-                                                 partyB.name,
-                                                 check_bits_strs[uidB]))
+                lines.append("{} <-> {} CBs: {}".format(partyA.name,
+                                                        partyB.name,
+                                                        check_bits_strs[uidB]))
 
         # Display the secret keys.
         first_line = True
-        for uidA in parties:
-            partyA = parties[uidA]
+        for partyA in parties.values():
             secret_keys = partyA.secret_keys
             secret_keys_by_uid = shared_fns.reorder_by_uid(secret_keys)
             secret_key_strs = shared_fns.convert_dod_to_dos(secret_keys_by_uid)
             for uidB in secret_keys_by_uid:
                 partyB = parties[uidB]
                 if first_line:
-                    print()
+                    lines.append("")
                     first_line = False
-                print("{} <-> {} key: {}".format(partyA.name,
-                                                 partyB.name,
-                                                 secret_key_strs[uidB]))
+                lines.append("{} <-> {} key: {}".format(partyA.name,
+                                                        partyB.name,
+                                                        secret_key_strs[uidB]))
+
+        print("\n".join(lines))
 
 
 class BB84(QKDProtocol):
@@ -353,21 +341,18 @@ class BB84(QKDProtocol):
         if self.eavesdropping:
             eve = self.network_manager.get_party(2)
 
-        valid_bits = [0, 1]
-        valid_bases = [consts.STD_BASIS, consts.HAD_BASIS]
-
         # Bob randomly picks a basis.
-        bob_basis = bob.choose_from(valid_bases)
+        bob_basis = consts.BASES[random.getrandbits(1)]
         bob.set_basis(alice.uid, bob_basis)
 
         eve_basis = None
         if self.eavesdropping:
-            eve_basis = eve.choose_from(valid_bases)
+            eve_basis = consts.BASES[random.getrandbits(1)]
             eve.set_basis(alice.uid, eve_basis)
 
         # Alice randomly picks a bit and basis
-        bit = alice.choose_from(valid_bits)
-        alice_basis = alice.choose_from(valid_bases)
+        bit = random.getrandbits(1)
+        alice_basis = consts.BASES[random.getrandbits(1)]
 
         # Alice sends the corresponding qubit to Bob.
         alice.send_state(bit, alice_basis, bob.uid)
@@ -387,7 +372,8 @@ class BB84(QKDProtocol):
 
         # Check whether Alice and Bob used the same basis.
         bases_match = False
-        if np.allclose(rx_bases[bob.uid][alice.uid], tx_bases[alice.uid][bob.uid]):
+        if shared_fns.bases_match(rx_bases[bob.uid][alice.uid],
+                                  tx_bases[alice.uid][bob.uid]):
             bases_match = True
 
         # If all the bases match, then add the bit to the sifted key.
@@ -426,14 +412,11 @@ class BB84(QKDProtocol):
 
         # TODO Indent this one more to the right? Only needs to happen when Alice and Bob use the same basis.
         # Remove all check bits from the secret keys.
-        alice.synch_sifted_and_secret_keys()
-        alice.remove_check_bits_from_secret_keys()
-        bob.synch_sifted_and_secret_keys()
-        bob.remove_check_bits_from_secret_keys()
+        alice.update_secret_keys()
+        bob.update_secret_keys()
 
         if self.eavesdropping:
-            eve.synch_sifted_and_secret_keys()
-            eve.remove_check_bits_from_secret_keys()
+            eve.update_secret_keys()
 
         return protocol_secure
 
@@ -481,12 +464,9 @@ class ChainedBB84(QKDProtocol):
         if intercepted_edges:
             self.add_eavesdropping(intercepted_edges)
 
-    def protocol(self):
-        '''Run the chained BB84 protocol.'''
-        protocol_secure = True
+    def update_party_roles(self):
+        '''Find the uid of the first party in the chain.'''
         parties = self.network_manager.get_parties()
-
-        # Find the uid of the first party in the chain.
         first_party_uid = None
         for uid in parties:
             predecessors = self.network_manager.get_predecessors(uid)
@@ -498,13 +478,20 @@ class ChainedBB84(QKDProtocol):
             # TODO Raise a more precise type of exception.
             raise Exception("The chain must have a first party.")
 
+        self.first_party_uid = first_party_uid
+
+    def protocol(self):
+        '''Run the chained BB84 protocol.'''
+        protocol_secure = True
+        parties = self.network_manager.get_parties()
+        first_party_uid = self.first_party_uid
+
         # Set a random measurement basis for each receiving party
         # (i.e. every party except the first party in the chain).
         for uid in parties:
             if uid != first_party_uid:
                 # Choose randomly between the standard and Hadamard bases.
-                basis = random.choice([consts.STD_BASIS,
-                                       consts.HAD_BASIS])
+                basis = consts.BASES[random.getrandbits(1)]
                 # Record that the next qubit received by this party should be
                 # measured w.r.t. this basis.
                 predecessor_uid = self.network_manager.get_predecessors(uid)[0]
@@ -525,8 +512,8 @@ class ChainedBB84(QKDProtocol):
             raise Exception("The first party in the chain doesn't have a successor.")
         successor_uid = successors[0]
 
-        bit = random.choice([0, 1])
-        basis = random.choice([consts.STD_BASIS, consts.HAD_BASIS])
+        bit = random.getrandbits(1)
+        basis = consts.BASES[random.getrandbits(1)]
         # first_party.send_qubit(successor_uid, bit, basis)
         # coeffs = basis[bit]
         # state = first_party.generate_state(coeffs)
@@ -549,7 +536,7 @@ class ChainedBB84(QKDProtocol):
             measurement_bases = rx_bases[rx_uid]
             for tx_uid in measurement_bases:
                 meas_basis = measurement_bases[tx_uid]
-                if not np.allclose(meas_basis, first_party_tx_basis):
+                if not shared_fns.bases_match(meas_basis, first_party_tx_basis):
                     bases_match = False
                     break
             if not bases_match:
@@ -557,8 +544,8 @@ class ChainedBB84(QKDProtocol):
 
         # If all the bases match, then add the bit to the sifted key.
         if bases_match:
-            for uid in parties:
-                parties[uid].add_all_bits_to_keys()
+            for party in parties.values():
+                party.add_all_bits_to_keys()
 
             # The sifted key bits from this iteration are used as check bits
             # with probability check_bit_prob.
@@ -596,9 +583,8 @@ class ChainedBB84(QKDProtocol):
                         return protocol_secure
 
         # Remove all check bits from the secret keys.
-        for uid in parties:
-            parties[uid].synch_sifted_and_secret_keys()
-            parties[uid].remove_check_bits_from_secret_keys()
+        for party in parties.values():
+            party.update_secret_keys()
 
         return protocol_secure
 
@@ -634,13 +620,9 @@ class Repeated2PartyQKD(QKDProtocol):
         if intercepted_edges:
             self.add_eavesdropping(intercepted_edges)
 
-    def protocol(self):
-        '''Run BB84 Star Graph Protocol 2. TODO generalise to any connected network.'''
-        # TODO Check that the given network is a star graph.
-        protocol_secure = True
+    def update_party_roles(self):
+        '''Find the uid of the protocol leader.'''
         parties = self.network_manager.get_parties()
-
-        # Find the uid of the protocol leader.
         leader_uid = None
         for uid in parties:
             is_leader = True
@@ -657,12 +639,20 @@ class Repeated2PartyQKD(QKDProtocol):
             # Raise a more precise type of exception.
             raise Exception("The given network doesn't have a leader.")
 
+        self.leader_uid = leader_uid
+
+    def protocol(self):
+        '''Run BB84 Star Graph Protocol 2. TODO generalise to any connected network.'''
+        # TODO Check that the given network is a star graph.
+        protocol_secure = True
+        parties = self.network_manager.get_parties()
+        leader_uid = self.leader_uid
+
         # Set a random measurement basis for each receiving party
         # (i.e. every party except the leader).
         for uid in parties:
             if uid != leader_uid:
-                basis = random.choice([consts.STD_BASIS,
-                                       consts.HAD_BASIS])
+                basis = consts.BASES[random.getrandbits(1)]
                 parties[uid].next_qubit_is_from(leader_uid)
                 parties[uid].measure_next_qubit_wrt(basis)
 
@@ -671,9 +661,8 @@ class Repeated2PartyQKD(QKDProtocol):
         leader = parties[leader_uid]
         successors = self.network_manager.get_successors(leader_uid)
         for successor_uid in successors:
-            bit = random.choice([0, 1])
-            basis = random.choice([consts.STD_BASIS,
-                                   consts.HAD_BASIS])
+            bit = random.getrandbits(1)
+            basis = consts.BASES[random.getrandbits(1)]
             # leader.send_qubit(successor_uid, bit, basis)
             coeffs = basis[bit]
             state = leader.generate_state(coeffs)
@@ -692,7 +681,7 @@ class Repeated2PartyQKD(QKDProtocol):
         for rx_uid in tx_bases[leader_uid]:
             tx_basis = tx_bases[leader_uid][rx_uid]
             rx_basis = rx_bases[rx_uid][leader_uid]
-            if np.allclose(tx_basis, rx_basis):
+            if shared_fns.bases_match(tx_basis, rx_basis):
                 rx_uids_with_correct_basis.append(rx_uid)
 
         # If any of the basis pairs match, then add the bit to the sifted key.
@@ -727,8 +716,8 @@ class Repeated2PartyQKD(QKDProtocol):
                     return protocol_secure
 
         # Remove all check bits from the secret keys.
-        for uid in parties:
-            parties[uid].remove_check_bits_from_secret_keys()
+        for party in parties.values():
+            party.remove_check_bits_from_secret_keys()
 
         # The protocol leader, who knows all of the secret keys, broadcasts
         # instructions about which bits of which keys need to be flipped so
@@ -5,6 +5,9 @@ import shared_fns
 
 class NQubitState:
 
+    # Marks objects that can be transmitted across a quantum channel.
+    is_quantum_state = True
+
     def __init__(self, coefficients):
         # The state is represented by a vector of coefficients in the
         # standard basis; e.g. coeffs [a, b] <--> state a|0> + b|1> and
@@ -82,7 +85,7 @@ class NQubitState:
         '''Retrieve the qubit at the specified position.'''
         return self.qubits[position]
 
-    def measure(self, operator):
+    def measure(self, operator, eigh=None):
         '''Measure the state using the given operator.'''
         # Check that the operator is square.
         shape = operator.shape
@@ -93,11 +96,11 @@ class NQubitState:
         # Rename the coefficients variable (just for convenience).
         psi = self.coefficients
 
-        # Calculate the eigenvalues and eigenvectors of the given operator.
-        eigh = np.linalg.eigh(operator)
-        eigenvalues = [int(round(eigh[0][i])) for i in range(eigh[0].size)]
-        eigenvalues = np.array(eigenvalues)
-        eigenvectors = eigh[1]
+        # Calculate the eigenvalues and eigenvectors of the given operator
+        # (unless they have already been provided).
+        if eigh is None:
+            eigh = shared_fns.get_eigen_decomposition(operator)
+        eigenvalues, eigenvectors = eigh
 
         # The number of subspaces that the state can be projected onto is
         # given by the number of distinct eigenvalues.
@@ -139,6 +142,9 @@ class NQubitState:
 
 class Qubit:
 
+    # Marks objects that can be transmitted across a quantum channel.
+    is_quantum_state = True
+
     def __init__(self, state, position):
         # Check that the given state is an instance of NQubitState.
         if not isinstance(state, NQubitState):
@@ -20,6 +20,31 @@ def get_measurement_operator(eigenvalues, eigenvectors):
 
     return M
 
+def get_eigen_decomposition(operator):
+    '''Find the (rounded) eigenvalues and the eigenvectors of a Hermitian operator.'''
+    eigh = np.linalg.eigh(operator)
+    eigenvalues = [int(round(eigh[0][i])) for i in range(eigh[0].size)]
+    return (np.array(eigenvalues), eigh[1])
+
+# Cache the measurement operator for each basis and its eigen-decomposition.
+# Format: {basis bytes: (operator, (eigenvalues, eigenvectors)), ...}
+_MEASUREMENT_CACHE = {}
+
+def get_basis_measurement(basis):
+    '''
+    Find the operator for measuring a qubit w.r.t. the given basis, along with
+    the operator's eigen-decomposition.
+
+    The same few bases are used for every measurement, so the results are
+    cached. The returned arrays are shared and must not be modified.
+    '''
+    key = np.asarray(basis, dtype=float).tobytes()
+    if key not in _MEASUREMENT_CACHE:
+        operator = get_measurement_operator([0, 1], basis)
+        _MEASUREMENT_CACHE[key] = (operator, get_eigen_decomposition(operator))
+
+    return _MEASUREMENT_CACHE[key]
+
 def normalise(vector):
     norm = math.sqrt(vector.dot(vector))
     if norm:
@@ -27,14 +52,10 @@ def normalise(vector):
     return vector
 
 def append_to_dol(dict_of_lists, key, new_val):
-    if key not in dict_of_lists:
-        dict_of_lists[key] = []
-
-    dict_of_lists[key].append(new_val)
+    dict_of_lists.setdefault(key, []).append(new_val)
 
 def convert_list_to_string(lst):
-    list_of_strs = [str(val) for val in lst]
-    return "".join(list_of_strs)
+    return "".join(map(str, lst))
 
 def convert_dol_to_dos(dol):
     '''Convert a dict of lists to a dict of strings.'''
@@ -48,12 +69,11 @@ def convert_dod_to_dol(dod):
     '''Convert a dict of dicts to a dict of lists.'''
     dol = {}
     for uid in dod:
-        dol[uid] = []
-        for timestep in sorted(dod[uid]):
-            val = dod[uid][timestep]
-            while timestep > len(dol[uid]):
-                dol[uid].append(' ')
-            dol[uid].append(val)
+        # Timesteps without a value are padded with a space.
+        vals = dod[uid]
+        dol[uid] = [' '] * (max(vals) + 1) if vals else []
+        for timestep, val in vals.items():
+            dol[uid][timestep] = val
 
     return dol
 
@@ -69,22 +89,52 @@ def reorder_by_uid(by_timestep):
     return a dictionary with format {uid: {timestep: value, ...}, ...}.
     '''
     by_uid = {}
-    for timestep in by_timestep:
-        for uid in by_timestep[timestep]:
-            if uid not in by_uid:
-                by_uid[uid] = {}
-            by_uid[uid][timestep] = by_timestep[timestep][uid]
+    for timestep, vals in by_timestep.items():
+        for uid, val in vals.items():
+            by_uid.setdefault(uid, {})[timestep] = val
 
     return by_uid
 
+def count_by_uid(by_timestep):
+    '''
+    Take a dictionary of the format {timestep: {uid: value, ...}, ...};
+    return a dictionary with format {uid: number of values, ...}.
+    '''
+    counts = {}
+    for vals in by_timestep.values():
+        for uid in vals:
+            counts[uid] = counts.get(uid, 0) + 1
+
+    return counts
+
+# Map the identity of each basis in consts.BASES to its tag, so that the bases
+# chosen by the protocols can be recognised without comparing their elements.
+BASIS_IDS = {id(basis): basis_id for basis_id, basis in enumerate(consts.BASES)}
+BASIS_CHARS = {consts.STD_BASIS_ID: 'S', consts.HAD_BASIS_ID: 'H'}
+
+def get_basis_id(basis):
+    '''Return the tag of a basis in consts.BASES (None if it isn't one of them).'''
+    basis_id = BASIS_IDS.get(id(basis))
+    if basis_id is None:
+        # Fall back to comparing the elements (e.g. for a copy of a basis).
+        for known_id, known_basis in enumerate(consts.BASES):
+            if np.allclose(basis, known_basis):
+                return known_id
+    return basis_id
+
+def bases_match(basis1, basis2):
+    '''Return True if the two bases are the same.'''
+    if basis1 is basis2:
+        return True
+    basis1_id = get_basis_id(basis1)
+    basis2_id = get_basis_id(basis2)
+    if basis1_id is not None and basis2_id is not None:
+        return basis1_id == basis2_id
+    return np.allclose(basis1, basis2)
+
 def represent_basis_by_char(basis):
     '''Represent a np.array basis by a character.'''
-    basis_char = '?'
-    if np.allclose(basis, consts.STD_BASIS):
-        basis_char = 'S'
-    elif np.allclose(basis, consts.HAD_BASIS):
-        basis_char = 'H'
-    return basis_char
+    return BASIS_CHARS.get(get_basis_id(basis), '?')
 
 def represent_bases_by_chars(bases):
     '''Convert a (dict of dicts of np.arrays) to a (dict of dicts of chars).
@@ -102,14 +152,9 @@ def represent_bases_by_chars(bases):
     return basis_chars
 
 def add_spaces_to_bitstring(bitstr, idxs, str_len):
-    padded_bitstr = ""
-    i = 0
-
-    for count in range(str_len):
-        if count in idxs:
-            padded_bitstr += bitstr[i]
-            i += 1
-        else:
-            padded_bitstr += " "
+    padded_bitstr = [" "] * str_len
+    positions = sorted(c for c in set(idxs) if 0 <= c < str_len)
+    for i, count in enumerate(positions):
+        padded_bitstr[count] = bitstr[i]
 
-    return padded_bitstr
+    return "".join(padded_bitstr)